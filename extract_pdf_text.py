@@ -3,37 +3,118 @@
 Extract and display text content from PDF files
 """
 
+import logging
 import os
+import shutil
+import subprocess
+import sys
+
+# Log through a single handler instead of printing from every loop iteration
+logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+log = logging.getLogger(__name__)
+
+# Poppler's pdftotext is native and much faster than the Python extractors for batch runs
+PDFTOTEXT_PATH = shutil.which("pdftotext")
 
 try:
-    from PyPDF2 import PdfReader
-    PDF_SUPPORT = True
+    # Prefer PyMuPDF: its C engine is much faster than PyPDF2's pure-Python parser
+    import pymupdf
+    PDF_BACKEND = "pymupdf"
+    # Default plain-text flags plus dehyphenation, so words split across lines are joined
+    PDF_TEXT_FLAGS = pymupdf.TEXTFLAGS_TEXT | pymupdf.TEXT_DEHYPHENATE
 except ImportError:
-    print("PyPDF2 not installed. Install with: pip install PyPDF2")
-    PDF_SUPPORT = False
+    try:
+        from PyPDF2 import PdfReader
+        PDF_BACKEND = "pypdf2"
+    except ImportError:
+        log.warning("No PDF library installed. Install with: pip install pymupdf (or PyPDF2)")
+        PDF_BACKEND = None
+
+PDF_SUPPORT = PDF_BACKEND is not None
+
+def is_pdf_file(pdf_path):
+    """Check for the %PDF- signature, which readers accept anywhere in the first 1024 bytes"""
+    try:
+        with open(pdf_path, 'rb') as file:
+            return b'%PDF-' in file.read(1024)
+    except OSError:
+        return False
+
+def extract_text_with_pdftotext(pdf_path):
+    """Extract text using the poppler pdftotext binary
+    
+    Returns:
+        Extracted text, or None if pdftotext is missing or fails
+    """
+    if not PDFTOTEXT_PATH:
+        return None
+    
+    try:
+        result = subprocess.run(
+            [PDFTOTEXT_PATH, "-layout", pdf_path, "-"],
+            capture_output=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        log.warning(f"pdftotext failed, falling back to Python extraction: {e}")
+        return None
+    
+    # pdftotext separates pages with form feeds; keep the same page markers as below
+    pages = result.stdout.decode('utf-8', errors='replace').split('\f')
+    if pages and not pages[-1].strip():
+        pages.pop()
+    log.info(f"PDF has {len(pages)} pages")
+    
+    text = "".join(
+        f"\n--- Page {i} ---\n{page_text}\n"
+        for i, page_text in enumerate(pages, 1)
+    )
+    return text.strip()
 
 def extract_text_from_pdf(pdf_path):
     """Extract text content from a PDF file"""
+    # Skip starting a parser for files that are not PDFs at all
+    if not is_pdf_file(pdf_path):
+        return "Error extracting PDF text: file is not a PDF (missing %PDF- header)"
+    
+    text = extract_text_with_pdftotext(pdf_path)
+    if text is not None:
+        return text
+    
     if not PDF_SUPPORT:
-        return "PDF text extraction not available - install PyPDF2"
+        return "PDF text extraction not available - install pymupdf or PyPDF2"
     
     try:
+        if PDF_BACKEND == "pymupdf":
+            doc = pymupdf.open(pdf_path)
+            try:
+                log.info(f"PDF has {doc.page_count} pages")
+                text = "".join(
+                    f"\n--- Page {i} ---\n{page.get_text('text', flags=PDF_TEXT_FLAGS)}\n"
+                    for i, page in enumerate(doc, 1)
+                )
+            finally:
+                doc.close()
+            return text.strip()
+        
         with open(pdf_path, 'rb') as file:
             reader = PdfReader(file)
             
-            text = ""
-            print(f"PDF has {len(reader.pages)} pages")
+            # Collect the pieces and join once to avoid quadratic string concatenation
+            parts = []
+            log.info(f"PDF has {len(reader.pages)} pages")
             
             for i, page in enumerate(reader.pages, 1):
-                page_text = page.extract_text()
-                text += f"\n--- Page {i} ---\n{page_text}\n"
+                parts.append(f"\n--- Page {i} ---\n")
+                parts.append(page.extract_text() or "")
+                parts.append("\n")
             
-            return text.strip()
+            return "".join(parts).strip()
     except Exception as e:
         return f"Error extracting PDF text: {e}"
 
 def main():
-    print("=== PDF Text Extraction ===")
+    log.info("=== PDF Text Extraction ===")
     
     # Check for downloaded PDF files
     pdf_files = [
@@ -43,28 +124,30 @@ def main():
     
     for pdf_file in pdf_files:
         if os.path.exists(pdf_file):
-            print(f"\n--- Extracting text from: {pdf_file} ---")
+            log.info(f"\n--- Extracting text from: {pdf_file} ---")
             
             file_size = os.path.getsize(pdf_file)
-            print(f"File size: {file_size} bytes")
+            log.info(f"File size: {file_size} bytes")
             
             if file_size > 0:
                 text = extract_text_from_pdf(pdf_file)
                 
-                print(f"\nEXTRACTED TEXT:")
-                print("=" * 60)
-                print(text)
-                print("=" * 60)
+                log.info(f"\nEXTRACTED TEXT:")
+                log.info("=" * 60)
+                log.info(text)
+                log.info("=" * 60)
                 
                 # Save text to file
                 text_file = pdf_file.replace('.pdf', '_text.txt')
-                with open(text_file, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                print(f"\nText saved to: {text_file}")
+                # Encode once and write with a large buffer so the text goes out in few syscalls
+                data = text.encode('utf-8')
+                with open(text_file, 'wb', buffering=1024 * 1024) as f:
+                    f.write(data)
+                log.info(f"\nText saved to: {text_file}")
             else:
-                print("File is empty (0 bytes)")
+                log.warning("File is empty (0 bytes)")
         else:
-            print(f"File not found: {pdf_file}")
+            log.warning(f"File not found: {pdf_file}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -7,22 +7,49 @@ and display their content
 
 import os
 import asyncio
+import logging
+import sys
 import base64
-import io
+import hashlib
+import json
+import shutil
+import subprocess
+import tempfile
 from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+# Log through a single handler instead of printing from every loop iteration and coroutine
+logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+log = logging.getLogger(__name__)
+
 # Import required libraries
 import aiohttp
 import requests
 try:
-    # Try to import PyPDF2 for PDF processing
-    from PyPDF2 import PdfReader
-    PDF_SUPPORT = True
+    # orjson decodes large API responses several times faster than the stdlib json module
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+try:
+    # Prefer PyMuPDF for PDF processing: its C engine is much faster than PyPDF2
+    import pymupdf
+    PDF_BACKEND = "pymupdf"
+    # Default plain-text flags plus dehyphenation, so words split across lines are joined
+    PDF_TEXT_FLAGS = pymupdf.TEXTFLAGS_TEXT | pymupdf.TEXT_DEHYPHENATE
 except ImportError:
-    print("PyPDF2 not installed. PDF content extraction disabled.")
-    print("Run 'pip install PyPDF2' to enable PDF extraction.")
-    PDF_SUPPORT = False
+    try:
+        # Fall back to PyPDF2 if PyMuPDF is not available
+        from PyPDF2 import PdfReader
+        PDF_BACKEND = "pypdf2"
+    except ImportError:
+        log.warning("Neither PyMuPDF nor PyPDF2 is installed. PDF content extraction disabled.")
+        log.warning("Run 'pip install pymupdf' to enable PDF extraction.")
+        PDF_BACKEND = None
+
+PDF_SUPPORT = PDF_BACKEND is not None
+
+# Poppler's pdftotext is native and much faster than the Python extractors
+PDFTOTEXT_PATH = shutil.which("pdftotext")
 
 # Load environment variables from .env file
 load_dotenv()
@@ -42,17 +69,66 @@ if not PASSWORD:
     missing_vars.append("SERVICENOW_PASSWORD")
 
 if missing_vars:
-    print(f"Error: The following environment variables are required but missing: {', '.join(missing_vars)}")
-    print("Please create a .env file with these variables or set them in your environment.")
-    print("Example .env file content:")
-    print("SERVICENOW_INSTANCE_URL=https://[your-instance].service-now.com")
-    print("SERVICENOW_USERNAME=your-username")
-    print("SERVICENOW_PASSWORD=your-password")
+    log.error(f"Error: The following environment variables are required but missing: {', '.join(missing_vars)}")
+    log.info("Please create a .env file with these variables or set them in your environment.")
+    log.info("Example .env file content:")
+    log.info("SERVICENOW_INSTANCE_URL=https://[your-instance].service-now.com")
+    log.info("SERVICENOW_USERNAME=your-username")
+    log.info("SERVICENOW_PASSWORD=your-password")
     exit(1)
 
 # Ensure instance URL has no trailing slash
 INSTANCE_URL = INSTANCE_URL.rstrip('/')
 
+# Content types that PDF attachments are stored with, including legacy aliases
+PDF_CONTENT_TYPES = frozenset({'application/pdf', 'application/x-pdf', 'application/acrobat'})
+
+# Encoded query condition that makes ServiceNow return only PDF attachments
+PDF_ATTACHMENT_QUERY = f"content_typeIN{','.join(sorted(PDF_CONTENT_TYPES))}^ORfile_nameENDSWITH.pdf"
+
+# Preview settings: only the start of each PDF is downloaded and parsed unless full content is requested
+PREVIEW_ONLY = os.getenv("PDF_FULL_CONTENT", "false").lower() != "true"
+PREVIEW_BYTES = 256 * 1024
+PREVIEW_CHARS = 500
+PREVIEW_PAGES = 3  # Pages converted by pdftotext for a preview
+
+# Newest first, with sys_id as a unique tiebreaker: sys_updated_on has one-second resolution,
+# so without it rows sharing a timestamp can move between offset pages
+ARTICLE_ORDER_QUERY = 'ORDERBYDESCsys_updated_on^ORDERBYsys_id'
+
+# Retry settings for transient ServiceNow errors such as rate limiting
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 0.3  # Seconds, doubled after each attempt
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Size of the chunks used when streaming attachment downloads to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Knowledge article listings are cached here and reused while the knowledge base is unchanged
+ARTICLE_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".kb_article_cache.json")
+
+
+def load_cached_articles(cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Load the cached article listing if it was stored under cache_key"""
+    try:
+        with open(ARTICLE_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if cache.get('key') != cache_key:
+        return None
+    return cache.get('articles')
+
+
+def save_cached_articles(cache_key: str, articles: List[Dict[str, Any]]) -> None:
+    """Store the article listing in the cache file under cache_key"""
+    try:
+        with open(ARTICLE_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'key': cache_key, 'articles': articles}, f)
+    except OSError as e:
+        log.warning(f"Could not write article cache: {e}")
+
 class PolicyDocumentRetriever:
     """Simple class to retrieve policy documents from ServiceNow"""
     
@@ -65,193 +141,434 @@ class PolicyDocumentRetriever:
         if not self.session:
             auth = aiohttp.BasicAuth(USERNAME, PASSWORD)
             timeout = aiohttp.ClientTimeout(total=30)
+            # Keep connections to the instance alive so concurrent requests reuse them
+            connector = aiohttp.TCPConnector(
+                limit=32,
+                limit_per_host=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True
+            )
             
             self.session = aiohttp.ClientSession(
                 auth=auth,
                 timeout=timeout,
+                connector=connector,
+                # Only GETs are sent, so no Content-Type; compressed JSON is decoded transparently
                 headers={
                     'Accept': 'application/json',
-                    'Content-Type': 'application/json'
+                    'Accept-Encoding': 'gzip, deflate'
                 }
             )
-            print("Created ServiceNow API session")
+            log.debug("Created ServiceNow API session")
         return self.session
     
-    async def get_all_knowledge_articles(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get all knowledge articles from ServiceNow"""
+    async def get_with_retry(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """Send a GET request, retrying with exponential backoff on transient failures
+        
+        Retries on rate limiting, transient server errors and connection errors. The
+        returned response must be released by the caller, e.g. with `async with`.
+        """
         session = await self.get_session()
         
-        # Get all articles regardless of workflow state to find PDF attachments
+        for attempt in range(MAX_ATTEMPTS):
+            last_attempt = attempt == MAX_ATTEMPTS - 1
+            try:
+                response = await session.get(url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                continue
+            
+            if response.status not in RETRY_STATUSES or last_attempt:
+                return response
+            
+            # Honour the server's Retry-After hint when it gives one in seconds
+            retry_after = response.headers.get('Retry-After', '')
+            delay = float(retry_after) if retry_after.isdigit() else RETRY_BACKOFF * 2 ** attempt
+            response.release()
+            await asyncio.sleep(delay)
+    
+    async def get_articles_fingerprint(self) -> Optional[str]:
+        """Get a cheap fingerprint of the knowledge base used to validate the article cache
+        
+        Combines the total article count with the most recent sys_updated_on value,
+        so adding, updating or deleting an article changes the fingerprint.
+        """
         params = {
-            'sysparm_fields': 'sys_id,number,short_description,text,category,sys_updated_on,workflow_state',
-            'sysparm_limit': limit
+            'sysparm_query': ARTICLE_ORDER_QUERY,
+            'sysparm_fields': 'sys_updated_on',
+            'sysparm_limit': 1
         }
         
         url = f"{INSTANCE_URL}/api/now/table/kb_knowledge"
         
         try:
-            async with session.get(url, params=params) as response:
+            async with await self.get_with_retry(url, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    articles = data.get('result', [])
-                    print(f"Retrieved {len(articles)} knowledge articles")
-                    return articles
+                    data = json_loads(await response.read())
+                    result = data.get('result', [])
+                    latest = result[0].get('sys_updated_on', '') if result else ''
+                    total = response.headers.get('X-Total-Count', '')
+                    return hashlib.sha1(f"{total}|{latest}".encode('utf-8')).hexdigest()
                 else:
-                    print(f"Error retrieving articles: HTTP {response.status}")
-                    return []
+                    log.error(f"Error retrieving article fingerprint: HTTP {response.status}")
+                    return None
         except Exception as e:
-            print(f"Exception retrieving articles: {e}")
-            return []
+            log.error(f"Exception retrieving article fingerprint: {e}")
+            return None
     
-    async def get_article_attachments(self, article_id: str) -> List[Dict[str, Any]]:
-        """Get attachments for a knowledge article"""
-        session = await self.get_session()
+    async def get_all_knowledge_articles(self, limit: Optional[int] = None, page_size: int = 100,
+                                         use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Get all knowledge articles from ServiceNow
+        
+        Only the fields used downstream are requested, paging through the results newest
+        first by sys_updated_on until every article (or limit articles) has been read. The
+        listing is cached on disk and reused as long as the knowledge base fingerprint is
+        unchanged.
         
+        Args:
+            limit: Maximum number of articles to retrieve, or None for all of them
+            page_size: Number of articles requested per call
+            use_cache: Whether to read and write the on-disk article cache
+        """
+        cache_key = None
+        if use_cache:
+            fingerprint = await self.get_articles_fingerprint()
+            if fingerprint:
+                cache_key = f"{fingerprint}:{limit}"
+                cached = load_cached_articles(cache_key)
+                if cached is not None:
+                    log.info(f"Loaded {len(cached)} knowledge articles from cache")
+                    return cached
+        
+        url = f"{INSTANCE_URL}/api/now/table/kb_knowledge"
+        
+        articles = []
+        complete = True
+        try:
+            while limit is None or len(articles) < limit:
+                # Get all articles regardless of workflow state to find PDF attachments,
+                # newest first (see ARTICLE_ORDER_QUERY) so recently uploaded policies are listed first
+                params = {
+                    'sysparm_query': ARTICLE_ORDER_QUERY,
+                    'sysparm_fields': 'sys_id,short_description',
+                    'sysparm_limit': page_size if limit is None else min(page_size, limit - len(articles)),
+                    'sysparm_offset': len(articles)
+                }
+                
+                async with await self.get_with_retry(url, params=params) as response:
+                    if response.status != 200:
+                        log.error(f"Error retrieving articles: HTTP {response.status}")
+                        complete = False
+                        break
+                    data = json_loads(await response.read())
+                
+                page = data.get('result', [])
+                articles.extend(page)
+                if len(page) < params['sysparm_limit']:
+                    break
+        except Exception as e:
+            log.error(f"Exception retrieving articles: {e}")
+            complete = False
+        
+        log.info(f"Retrieved {len(articles)} knowledge articles")
+        if cache_key and complete:
+            save_cached_articles(cache_key, articles)
+        return articles
+    
+    async def get_attachments_for_articles(self, article_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get PDF attachments for a batch of knowledge articles in a single query
+        
+        Returns:
+            Dict mapping each article sys_id to its list of PDF attachments
+        """
         params = {
-            'sysparm_query': f'table_name=kb_knowledge^table_sys_id={article_id}',
-            'sysparm_fields': 'sys_id,file_name,content_type,size_bytes'
+            'sysparm_query': f"table_name=kb_knowledge^table_sys_idIN{','.join(article_ids)}^{PDF_ATTACHMENT_QUERY}",
+            'sysparm_fields': 'sys_id,file_name,content_type,size_bytes,table_sys_id'
         }
         
         url = f"{INSTANCE_URL}/api/now/table/sys_attachment"
         
+        attachments_by_article: Dict[str, List[Dict[str, Any]]] = {}
         try:
-            async with session.get(url, params=params) as response:
+            async with await self.get_with_retry(url, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    attachments = data.get('result', [])
-                    print(f"Found {len(attachments)} attachments for article {article_id}")
-                    return attachments
+                    data = json_loads(await response.read())
+                    for attachment in data.get('result', []):
+                        attachments_by_article.setdefault(attachment.get('table_sys_id', ''), []).append(attachment)
                 else:
-                    print(f"Error retrieving attachments: HTTP {response.status}")
-                    return []
+                    log.error(f"Error retrieving attachments: HTTP {response.status}")
         except Exception as e:
-            print(f"Exception retrieving attachments: {e}")
-            return []
+            log.error(f"Exception retrieving attachments: {e}")
+        return attachments_by_article
     
-    async def download_attachment(self, attachment_id: str) -> Optional[bytes]:
-        """Download an attachment by ID"""
-        session = await self.get_session()
+    async def download_attachment(self, attachment_id: str, max_bytes: Optional[int] = None) -> Optional[str]:
+        """Download an attachment by ID to a temporary file
         
+        The response is streamed to disk in chunks so the PDF is never held in memory in full.
+        The caller is responsible for deleting the returned file.
+        
+        Args:
+            attachment_id: sys_id of the attachment
+            max_bytes: If set, download only the first max_bytes bytes (sent as an HTTP Range header)
+            
+        Returns:
+            Path to the downloaded file, or None if the download failed
+        """
         url = f"{INSTANCE_URL}/api/now/attachment/{attachment_id}/file"
+        # PDFs are already compressed, and a Range over a gzip-encoded body would not decode
+        headers = {'Accept-Encoding': 'identity'}
+        if max_bytes:
+            headers['Range'] = f'bytes=0-{max_bytes - 1}'
         
+        pdf_path = None
         try:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    print(f"Downloaded attachment {attachment_id}: {len(content)} bytes")
-                    return content
+            async with await self.get_with_retry(url, headers=headers) as response:
+                # 206 means the server honoured the Range header
+                if response.status in (200, 206):
+                    fd, pdf_path = tempfile.mkstemp(suffix='.pdf')
+                    size = 0
+                    with os.fdopen(fd, 'wb') as pdf_file:
+                        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                            pdf_file.write(chunk)
+                            size += len(chunk)
+                            # Stop early if the server ignored the Range header
+                            if max_bytes and size >= max_bytes:
+                                break
+                    log.debug(f"Downloaded attachment {attachment_id}: {size} bytes")
+                    return pdf_path
                 else:
-                    print(f"Error downloading attachment: HTTP {response.status}")
+                    log.error(f"Error downloading attachment: HTTP {response.status}")
                     return None
         except Exception as e:
-            print(f"Exception downloading attachment: {e}")
+            log.error(f"Exception downloading attachment: {e}")
+            if pdf_path and os.path.exists(pdf_path):
+                os.remove(pdf_path)
             return None
     
     async def close(self):
         """Close the session"""
         if self.session:
             await self.session.close()
-            print("Closed ServiceNow API session")
+            log.debug("Closed ServiceNow API session")
+
+
+def is_pdf_file(pdf_path: str) -> bool:
+    """Check for the %PDF- signature, which readers accept anywhere in the first 1024 bytes"""
+    try:
+        with open(pdf_path, 'rb') as pdf_file:
+            return b'%PDF-' in pdf_file.read(1024)
+    except OSError:
+        return False
 
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
-    """Extract text content from a PDF"""
+def extract_text_with_pdftotext(pdf_path: str, max_chars: Optional[int] = None,
+                                partial: bool = False) -> Optional[str]:
+    """Extract text from a PDF file using the poppler pdftotext binary
+    
+    Args:
+        pdf_path: Path to the PDF file
+        max_chars: If set, convert only the first PREVIEW_PAGES pages and stop at the
+            first page break after more than max_chars characters
+        partial: Whether the file is only the start of the PDF; any syntax error poppler
+            reports while reconstructing it makes the output untrustworthy
+    
+    Returns:
+        Extracted text, or None if pdftotext is missing, fails or needed to repair a partial file
+    """
+    if not PDFTOTEXT_PATH:
+        return None
+    
+    command = [PDFTOTEXT_PATH, "-layout"]
+    if max_chars is not None:
+        command += ["-l", str(PREVIEW_PAGES)]
+    
+    try:
+        result = subprocess.run(
+            command + [pdf_path, "-"],
+            capture_output=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        log.warning(f"pdftotext failed, falling back to Python extraction: {e}")
+        return None
+    
+    if partial and result.stderr.strip():
+        log.warning("pdftotext had to repair the partial download, its text cannot be trusted")
+        return None
+    
+    text = result.stdout.decode('utf-8', errors='replace')
+    if max_chars is None:
+        return text.strip()
+    
+    # pdftotext separates pages with form feeds
+    pages = []
+    extracted = 0
+    for page_text in text.split('\f'):
+        pages.append(page_text)
+        extracted += len(page_text) + 1
+        if extracted > max_chars:
+            break
+    return "\n".join(pages).strip()
+
+
+def extract_text_from_pdf(pdf_path: str, max_chars: Optional[int] = None,
+                          partial: bool = False) -> Optional[str]:
+    """Extract text content from a PDF file
+    
+    Args:
+        pdf_path: Path to the PDF file
+        max_chars: If set, stop parsing pages once more than max_chars characters have been extracted
+        partial: Whether the file is only the start of the PDF (a Range download). Fonts and
+            ToUnicode maps past the cut-off are missing from such files, so any text that
+            needed the parser to repair the file is garbled and None is returned instead
+    
+    Returns:
+        Extracted text, or None if the PDF could not be parsed (or not trusted when partial)
+    """
+    # Empty downloads or attachments whose content type lied are not worth starting a parser for
+    if not is_pdf_file(pdf_path):
+        return "[Not a PDF file - missing %PDF- header]"
+    
+    text = extract_text_with_pdftotext(pdf_path, max_chars, partial)
+    if text is not None:
+        return text
+    
     if not PDF_SUPPORT:
-        return "[PDF text extraction not available - install PyPDF2]"
+        return "[PDF text extraction not available - install pymupdf or PyPDF2]"
     
     try:
-        # Create a file-like object from bytes
-        pdf_file = io.BytesIO(pdf_content)
+        if PDF_BACKEND == "pymupdf":
+            # Open by path so MuPDF reads the file directly
+            doc = pymupdf.open(pdf_path, filetype="pdf")
+            try:
+                if partial and doc.is_repaired:
+                    log.warning("Partial download had to be repaired, its text cannot be trusted")
+                    return None
+                
+                pages = []
+                extracted = 0
+                for page in doc:
+                    page_text = page.get_text("text", flags=PDF_TEXT_FLAGS)
+                    pages.append(page_text)
+                    extracted += len(page_text)
+                    if max_chars is not None and extracted > max_chars:
+                        break
+                text = "\n".join(pages)
+            finally:
+                doc.close()
+            return text.strip()
         
-        # Create PDF reader
-        reader = PdfReader(pdf_file)
+        # Create PDF reader; strict mode raises instead of silently repairing a partial file
+        reader = PdfReader(pdf_path, strict=partial)
         
-        # Extract text from all pages
-        text = ""
+        # Extract text from all pages, joining once at the end to avoid quadratic concatenation
+        pages = []
+        extracted = 0
         for page in reader.pages:
-            text += page.extract_text() + "\n"
+            page_text = page.extract_text() or ""
+            pages.append(page_text)
+            extracted += len(page_text) + 1
+            if max_chars is not None and extracted > max_chars:
+                break
         
-        return text.strip()
+        return "\n".join(pages).strip()
     except Exception as e:
-        print(f"Error extracting PDF text: {e}")
-        return f"[PDF extraction error: {e}]"
+        log.error(f"Error extracting PDF text: {e}")
+        return None
 
 
-async def collect_pdf_attachments(retriever: PolicyDocumentRetriever) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+async def collect_pdf_attachments(retriever: PolicyDocumentRetriever,
+                                  batch_size: int = 50,
+                                  concurrency: int = 16) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
     """Collect all PDF attachments across all articles
     
+    Args:
+        retriever: Retriever used to query ServiceNow
+        batch_size: Number of articles covered by each attachment query
+        concurrency: Maximum number of attachment queries in flight at once
+    
     Returns:
         List of tuples with (article_info, attachment_info)
     """
     all_pdf_attachments = []
     
     # Step 1: Get all knowledge articles
-    print("\n1. Retrieving all knowledge articles...")
+    log.info("\n1. Retrieving all knowledge articles...")
     articles = await retriever.get_all_knowledge_articles()
     
     if not articles:
-        print("No articles found. Check your ServiceNow instance or credentials.")
+        log.info("No articles found. Check your ServiceNow instance or credentials.")
         return []
     
     # Step 2: Find PDF attachments across all articles
-    print("\n2. Searching for PDF attachments across all articles...")
+    log.info("\n2. Searching for PDF attachments across all articles...")
+    article_ids = [article.get('sys_id', '') for article in articles]
+    batches = [article_ids[i:i + batch_size] for i in range(0, len(article_ids), batch_size)]
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch_attachments(batch: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        async with semaphore:
+            return await retriever.get_attachments_for_articles(batch)
+    
+    # One sys_attachment query per batch of articles, issued concurrently on the shared session
+    attachments_by_article: Dict[str, List[Dict[str, Any]]] = {}
+    for result in await asyncio.gather(*(fetch_attachments(batch) for batch in batches)):
+        attachments_by_article.update(result)
+    
     for article in articles:
         article_id = article.get('sys_id', '')
         title = article.get('short_description', 'Untitled')
+        attachments = attachments_by_article.get(article_id, [])
         
-        # Get attachments for this article
-        attachments = await retriever.get_article_attachments(article_id)
-        
-        # Filter for PDF attachments only
+        # The attachment query only returns PDFs, so no client-side filtering is needed
         for attachment in attachments:
-            attachment_id = attachment.get('sys_id', '')
-            filename = attachment.get('file_name', '')
-            content_type = attachment.get('content_type', '')
+            # Create a simplified article info dict to keep with attachment
+            article_info = {
+                'sys_id': article_id,
+                'title': title,
+                'url': f"{INSTANCE_URL}/kb_view.do?sysparm_article={article_id}"
+            }
             
-            # Only consider PDF files
-            if content_type == 'application/pdf' or filename.lower().endswith('.pdf'):
-                # Create a simplified article info dict to keep with attachment
-                article_info = {
-                    'sys_id': article_id,
-                    'title': title,
-                    'url': f"{INSTANCE_URL}/kb_view.do?sysparm_article={article_id}"
-                }
-                
-                all_pdf_attachments.append((article_info, attachment))
+            all_pdf_attachments.append((article_info, attachment))
+    
+    log.info(f"Searched {len(articles)} articles for PDF attachments")
                 
     return all_pdf_attachments
 
 
 async def main():
     """Main function"""
-    print(f"\n===== ServiceNow Top 10 PDF Documents =====")
-    print(f"Instance: {INSTANCE_URL}")
-    print(f"Username: {USERNAME}")
-    print(f"Authentication: {'Configured' if PASSWORD else 'Missing'}")
+    log.info(f"\n===== ServiceNow Top 10 PDF Documents =====")
+    log.info(f"Instance: {INSTANCE_URL}")
+    log.info(f"Username: {USERNAME}")
+    log.info(f"Authentication: {'Configured' if PASSWORD else 'Missing'}")
     
     retriever = PolicyDocumentRetriever()
     
     try:
         # Step 1: Collect all PDF attachments across all articles
-        print("\nAttempting to connect to ServiceNow...")
+        log.info("\nAttempting to connect to ServiceNow...")
         pdf_attachments = await collect_pdf_attachments(retriever)
         
         if not pdf_attachments:
-            print("\nNo PDF attachments found across any articles.")
-            print("\nPossible reasons:")
-            print("1. No policy documents with PDF attachments exist in your ServiceNow instance")
-            print("2. Knowledge Management may not be properly configured")
-            print("3. Authentication or permission issues")
-            print("\nTroubleshooting tips:")
-            print("- Verify your ServiceNow credentials are correct")
-            print("- Check that Knowledge Management is enabled in your instance")
-            print("- Upload some PDF attachments to knowledge articles")
+            log.info("\nNo PDF attachments found across any articles.")
+            log.info("\nPossible reasons:")
+            log.info("1. No policy documents with PDF attachments exist in your ServiceNow instance")
+            log.info("2. Knowledge Management may not be properly configured")
+            log.info("3. Authentication or permission issues")
+            log.info("\nTroubleshooting tips:")
+            log.info("- Verify your ServiceNow credentials are correct")
+            log.info("- Check that Knowledge Management is enabled in your instance")
+            log.info("- Upload some PDF attachments to knowledge articles")
             return
         
         # Step 2: Process only the top 10 PDF attachments
         top_10_pdfs = pdf_attachments[:10]
-        print(f"\nFound {len(pdf_attachments)} total PDF attachments")
-        print(f"Processing top {len(top_10_pdfs)} PDF documents...\n")
+        log.info(f"\nFound {len(pdf_attachments)} total PDF attachments")
+        log.info(f"Processing top {len(top_10_pdfs)} PDF documents...\n")
         
         # Step 3: Download and display content for the top 10 PDFs
         for i, (article, attachment) in enumerate(top_10_pdfs):
@@ -260,38 +577,58 @@ async def main():
             content_type = attachment.get('content_type', '')
             size = attachment.get('size_bytes', '0')
             
-            print(f"\n--- PDF #{i+1}/{len(top_10_pdfs)} ---")
-            print(f"Filename: {filename}")
-            print(f"Size: {size} bytes")
-            print(f"From Article: {article['title']}")
-            print(f"Article URL: {article['url']}")
+            log.info(f"\n--- PDF #{i+1}/{len(top_10_pdfs)} ---")
+            log.info(f"Filename: {filename}")
+            log.info(f"Size: {size} bytes")
+            log.info(f"From Article: {article['title']}")
+            log.info(f"Article URL: {article['url']}")
             
-            # Download PDF content
-            print(f"Downloading PDF content...")
-            pdf_content = await retriever.download_attachment(attachment_id)
+            # Download PDF content (only the start of the file in preview mode)
+            log.info(f"Downloading PDF content...")
+            if PREVIEW_ONLY:
+                pdf_path = await retriever.download_attachment(attachment_id, max_bytes=PREVIEW_BYTES)
+                
+                # A download that filled the Range may be cut off before the objects the text needs
+                partial = pdf_path is not None and os.path.getsize(pdf_path) >= PREVIEW_BYTES
+                pdf_text = extract_text_from_pdf(pdf_path, max_chars=PREVIEW_CHARS, partial=partial) if pdf_path else ""
+                
+                # Partial downloads that cannot be parsed as they are get replaced by the whole file
+                if partial and not pdf_text:
+                    log.warning("Preview extraction failed, downloading full PDF...")
+                    os.remove(pdf_path)
+                    pdf_path = await retriever.download_attachment(attachment_id)
+                    pdf_text = extract_text_from_pdf(pdf_path, max_chars=PREVIEW_CHARS) if pdf_path else ""
+            else:
+                pdf_path = await retriever.download_attachment(attachment_id)
+                pdf_text = extract_text_from_pdf(pdf_path) if pdf_path else ""
             
-            if pdf_content:
-                # Extract text from PDF
-                pdf_text = extract_text_from_pdf(pdf_content)
+            if pdf_path:
+                # The text has been extracted, so the temporary file is no longer needed
+                os.remove(pdf_path)
                 
                 # Print PDF content
-                print(f"\nPDF CONTENT:")
-                print("-" * 40)
+                log.info(f"\nPDF CONTENT:")
+                log.info("-" * 40)
                 
-                # Print first 500 characters with more preview
-                if len(pdf_text) > 500:
-                    print(f"{pdf_text[:500]}...\n[Document continues - {len(pdf_text)} characters total]")
+                # Print the first PREVIEW_CHARS characters with more preview
+                if pdf_text is None:
+                    log.error("Failed to extract PDF text")
+                elif len(pdf_text) > PREVIEW_CHARS:
+                    if PREVIEW_ONLY:
+                        log.info(f"{pdf_text[:PREVIEW_CHARS]}...\n[Document continues - set PDF_FULL_CONTENT=true for the full text]")
+                    else:
+                        log.info(f"{pdf_text[:PREVIEW_CHARS]}...\n[Document continues - {len(pdf_text)} characters total]")
                 else:
-                    print(pdf_text)
+                    log.info(pdf_text)
                 
-                print("-" * 40)
+                log.info("-" * 40)
             else:
-                print("Failed to download PDF content")
+                log.error("Failed to download PDF content")
         
-        print(f"\n===== Top {len(top_10_pdfs)} PDF Documents Processed =====")
+        log.info(f"\n===== Top {len(top_10_pdfs)} PDF Documents Processed =====")
     
     except Exception as e:
-        print(f"Error in main: {e}")
+        log.error(f"Error in main: {e}")
     
     finally:
         # Close session
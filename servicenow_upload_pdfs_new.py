@@ -4,17 +4,28 @@ ServiceNow PDF Document Uploader
 A script to upload PDF files from a Policy folder to ServiceNow as knowledge article attachments
 """
 
+import logging
 import os
-import glob
 import json
 import base64
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from dotenv import load_dotenv
 import requests
+try:
+    # orjson decodes API responses faster than the stdlib json module
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import sys
 
-# Ensure output is not buffered (helps with seeing output in some terminal environments)
-sys.stdout.reconfigure(line_buffering=True)  # For Python 3.7+
+# Log through a single handler instead of printing from every upload thread
+logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+log = logging.getLogger(__name__)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -34,12 +45,12 @@ if not PASSWORD:
     missing_vars.append("SERVICENOW_PASSWORD")
 
 if missing_vars:
-    print(f"Error: The following environment variables are required but missing: {', '.join(missing_vars)}")
-    print("Please create a .env file with these variables or set them in your environment.")
-    print("Example .env file content:")
-    print("SERVICENOW_INSTANCE_URL=https://[your-instance].service-now.com")
-    print("SERVICENOW_USERNAME=your-username")
-    print("SERVICENOW_PASSWORD=your-password")
+    log.error(f"Error: The following environment variables are required but missing: {', '.join(missing_vars)}")
+    log.info("Please create a .env file with these variables or set them in your environment.")
+    log.info("Example .env file content:")
+    log.info("SERVICENOW_INSTANCE_URL=https://[your-instance].service-now.com")
+    log.info("SERVICENOW_USERNAME=your-username")
+    log.info("SERVICENOW_PASSWORD=your-password")
     exit(1)
 
 # Ensure instance URL has no trailing slash
@@ -48,6 +59,34 @@ INSTANCE_URL = INSTANCE_URL.rstrip('/')
 # Constants
 POLICY_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Policy")
 KB_BASE_CATEGORY = "0aa3ffa7db7c030064dd36cb7c96197f"  # General category, you may need to update this
+MAX_UPLOAD_WORKERS = 8  # Number of PDFs processed concurrently
+BATCH_SIZE = 100  # Number of articles created or published per Batch API call
+
+# Transient statuses worth retrying, and the subset that means the request was rejected before
+# being processed (so a non-idempotent POST can be retried without creating duplicates)
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+REJECTED_STATUSES = frozenset([429, 503])
+
+# Batch API statuses meaning the endpoint is unavailable, so none of the sub-requests ran
+BATCH_UNAVAILABLE_STATUSES = frozenset([400, 403, 404])
+
+class IdempotentRetry(Retry):
+    """Retry policy that only retries POSTs when the server rejected them outright
+    
+    A POST is retried on 429/503 responses and on connection errors (the request was never
+    sent), but not on other statuses or on read/protocol errors, which can happen after the
+    server has already created the record.
+    """
+    
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method == 'POST' and status_code not in REJECTED_STATUSES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+    
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if method == 'POST' and error is not None and not self._is_connection_error(error):
+            raise error.with_traceback(_stacktrace)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
 
 class ServiceNowUploader:
     """Class to handle uploading PDFs to ServiceNow"""
@@ -59,7 +98,23 @@ class ServiceNowUploader:
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         }
-        print(f"Initialized ServiceNow uploader for: {INSTANCE_URL}", flush=True)
+        # Shared session so TCP/TLS connections and auth are reused across requests and worker threads
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        # Content-Type is left to each request since JSON and file uploads use different body types
+        self.session.headers.update({'Accept': 'application/json'})
+        # Back off and retry on rate limiting and transient server errors
+        retry = IdempotentRetry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'POST', 'PATCH']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        log.info(f"Initialized ServiceNow uploader for: {INSTANCE_URL}")
     
     def create_knowledge_article(self, title, content, category=KB_BASE_CATEGORY):
         """Create a new knowledge article
@@ -82,25 +137,24 @@ class ServiceNowUploader:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 url, 
-                auth=self.auth,
                 headers=self.headers,
                 json=data
             )
             
             if response.status_code == 201:
-                result = response.json()
+                result = json_loads(response.content)
                 article_id = result['result']['sys_id']
-                print(f"Created knowledge article: {title} (ID: {article_id})", flush=True)
+                log.info(f"Created knowledge article: {title} (ID: {article_id})")
                 return article_id
             else:
-                print(f"Error creating article: HTTP {response.status_code}", flush=True)
-                print(f"Response: {response.text}", flush=True)
+                log.error(f"Error creating article: HTTP {response.status_code}")
+                log.error(f"Response: {response.text}")
                 return None
                 
         except Exception as e:
-            print(f"Exception creating article: {e}", flush=True)
+            log.error(f"Exception creating article: {e}")
             return None
     
     def publish_article(self, article_id):
@@ -119,55 +173,228 @@ class ServiceNowUploader:
         }
         
         try:
-            response = requests.patch(
+            response = self.session.patch(
                 url, 
-                auth=self.auth,
                 headers=self.headers,
                 json=data
             )
             
             if response.status_code == 200:
-                print(f"Published article ID: {article_id}", flush=True)
+                log.info(f"Published article ID: {article_id}")
                 return True
             else:
-                print(f"Error publishing article: HTTP {response.status_code}", flush=True)
-                print(f"Response: {response.text}", flush=True)
+                log.error(f"Error publishing article: HTTP {response.status_code}")
+                log.error(f"Response: {response.text}")
                 return False
                 
         except Exception as e:
-            print(f"Exception publishing article: {e}", flush=True)
+            log.error(f"Exception publishing article: {e}")
             return False
     
+    def send_batch(self, rest_requests):
+        """Send several REST requests in one call to the ServiceNow Batch API
+        
+        Args:
+            rest_requests: List of (id, method, url, body) tuples, with url relative to the instance
+            
+        Returns:
+            None if the Batch API is unavailable (nothing was run). Otherwise a dict mapping
+            request ids to (status_code, decoded body or None). Unserviced requests map to
+            (None, None). Ids missing from the dict have an unknown outcome, e.g. after a
+            5xx or timeout on the batch call, and must not be retried as individual requests.
+        """
+        url = f"{INSTANCE_URL}/api/now/v1/batch"
+        
+        data = {
+            "batch_request_id": str(uuid.uuid4()),
+            "rest_requests": [
+                {
+                    "id": request_id,
+                    "method": method,
+                    "url": request_url,
+                    "headers": [
+                        {"name": "Content-Type", "value": "application/json"},
+                        {"name": "Accept", "value": "application/json"}
+                    ],
+                    # Sub-request bodies are sent base64 encoded
+                    "body": base64.b64encode(json.dumps(body).encode('utf-8')).decode('ascii')
+                }
+                for request_id, method, request_url, body in rest_requests
+            ]
+        }
+        
+        try:
+            response = self.session.post(
+                url,
+                headers=self.headers,
+                json=data
+            )
+        except Exception as e:
+            log.error(f"Exception sending batch request: {e}")
+            return {}
+        
+        if response.status_code in BATCH_UNAVAILABLE_STATUSES:
+            log.warning(f"Batch API unavailable: HTTP {response.status_code}")
+            return None
+        if response.status_code != 200:
+            log.error(f"Error sending batch request: HTTP {response.status_code}")
+            log.error(f"Response: {response.text}")
+            return {}
+        
+        try:
+            result = json_loads(response.content)
+        except ValueError as e:
+            log.error(f"Exception parsing batch response: {e}")
+            return {}
+        
+        responses = {}
+        for unserviced in result.get('unserviced_requests', []):
+            request_id = unserviced.get('id') if isinstance(unserviced, dict) else unserviced
+            responses[request_id] = (None, None)
+        
+        # Parse each serviced request on its own so one bad body doesn't lose the others
+        for serviced in result.get('serviced_requests', []):
+            try:
+                request_id = serviced['id']
+            except (KeyError, TypeError):
+                log.error(f"Batch response entry without an id: {serviced}")
+                continue
+            status_code = serviced.get('status_code')
+            try:
+                body = serviced.get('body')
+                decoded = json_loads(base64.b64decode(body)) if body else {}
+            except (ValueError, TypeError) as e:
+                log.error(f"Exception parsing batch response for {request_id}: {e}")
+                decoded = None
+            responses[request_id] = (status_code, decoded)
+        return responses
+    
+    def create_knowledge_articles(self, articles, category=KB_BASE_CATEGORY):
+        """Create several draft knowledge articles with a single Batch API call
+        
+        Falls back to creating articles one by one if the Batch API is not available,
+        or for any article the batch left unserviced. Articles whose outcome is unknown
+        are reported as failed rather than created again.
+        
+        Args:
+            articles: List of (title, content) tuples
+            category: KB category sys_id
+            
+        Returns:
+            List with the sys_id of each created article, or None where creation failed
+        """
+        rest_requests = [
+            (f"create{i}", "POST", "/api/now/table/kb_knowledge", {
+                "short_description": title,
+                "text": content,
+                "kb_category": category,
+                "workflow_state": "draft"  # Start as draft
+            })
+            for i, (title, content) in enumerate(articles)
+        ]
+        
+        responses = self.send_batch(rest_requests)
+        if responses is None:
+            log.warning("Creating articles individually...")
+            return [self.create_knowledge_article(title, content, category) for title, content in articles]
+        
+        article_ids = []
+        for i, (title, content) in enumerate(articles):
+            request_id = f"create{i}"
+            status_code, body = responses.get(request_id, (None, None))
+            if request_id not in responses:
+                log.error(f"No batch response for article {title}; it may or may not have been created")
+                article_id = None
+            elif status_code == 201:
+                article_id = ((body or {}).get('result') or {}).get('sys_id')
+                if article_id:
+                    log.info(f"Created knowledge article: {title} (ID: {article_id})")
+                else:
+                    log.error(f"Created article {title} but could not read its sys_id from the batch response")
+            elif status_code is None:
+                article_id = self.create_knowledge_article(title, content, category)
+            else:
+                log.error(f"Error creating article {title}: HTTP {status_code}")
+                article_id = None
+            article_ids.append(article_id)
+        return article_ids
+    
+    def publish_articles(self, article_ids):
+        """Publish several draft knowledge articles with a single Batch API call
+        
+        Falls back to publishing articles one by one if the Batch API is not available,
+        or for any article the batch left unserviced. Articles whose outcome is unknown
+        are reported as failed.
+        
+        Args:
+            article_ids: List of sys_ids of the articles to publish
+            
+        Returns:
+            List with True for each article that was published, False otherwise
+        """
+        if not article_ids:
+            return []
+        
+        rest_requests = [
+            (f"publish{i}", "PATCH", f"/api/now/table/kb_knowledge/{article_id}", {
+                "workflow_state": "published"
+            })
+            for i, article_id in enumerate(article_ids)
+        ]
+        
+        responses = self.send_batch(rest_requests)
+        if responses is None:
+            log.warning("Publishing articles individually...")
+            return [self.publish_article(article_id) for article_id in article_ids]
+        
+        results = []
+        for i, article_id in enumerate(article_ids):
+            request_id = f"publish{i}"
+            status_code, _ = responses.get(request_id, (None, None))
+            if request_id not in responses:
+                log.error(f"No batch response for publishing article ID: {article_id}")
+                success = False
+            elif status_code == 200:
+                log.info(f"Published article ID: {article_id}")
+                success = True
+            elif status_code is None:
+                success = self.publish_article(article_id)
+            else:
+                log.error(f"Error publishing article {article_id}: HTTP {status_code}")
+                success = False
+            results.append(success)
+        return results
+    
     def upload_attachment(self, table_name, table_sys_id, file_path):
         """Upload a file as an attachment, with force-upload fallback logic."""
         file_name = os.path.basename(file_path)
         url = f"{INSTANCE_URL}/api/now/attachment/file"
         try:
-            print(f"Uploading attachment to: {url}", flush=True)
+            log.debug(f"Uploading attachment to: {url}")
+            params = {
+                'table_name': table_name,
+                'table_sys_id': table_sys_id,
+                'file_name': file_name
+            }
             with open(file_path, 'rb') as file_data:
-                files = {
-                    'file': (file_name, file_data, 'application/pdf')
-                }
-                data = {
-                    'table_name': table_name,
-                    'table_sys_id': table_sys_id
-                }
-                print(f"[Primary] Sending multipart/form-data...", flush=True)
-                response = requests.post(
+                # Send the raw file as the request body so requests streams it from disk
+                # instead of building a multipart body in memory
+                log.debug(f"[Primary] Streaming binary upload...")
+                response = self.session.post(
                     url,
-                    auth=self.auth,
-                    data=data,
-                    files=files
+                    params=params,
+                    headers={'Content-Type': 'application/pdf'},
+                    data=file_data
                 )
             if response.status_code == 201:
-                result = response.json()
+                result = json_loads(response.content)
                 attachment_id = result['result']['sys_id']
-                print(f"[Primary] Uploaded attachment: {file_name} (ID: {attachment_id})", flush=True)
+                log.info(f"[Primary] Uploaded attachment: {file_name} (ID: {attachment_id})")
                 return attachment_id
             else:
-                print(f"[Primary] Error: HTTP {response.status_code}", flush=True)
-                print(f"[Primary] Response: {response.text}", flush=True)
-                print("[Fallback] Trying sys_attachment base64 upload...", flush=True)
+                log.error(f"[Primary] Error: HTTP {response.status_code}")
+                log.error(f"[Primary] Response: {response.text}")
+                log.warning("[Fallback] Trying sys_attachment base64 upload...")
                 # Fallback: sys_attachment base64 method
                 url2 = f"{INSTANCE_URL}/api/now/table/sys_attachment"
                 with open(file_path, 'rb') as file_data:
@@ -181,82 +408,119 @@ class ServiceNowUploader:
                     "size_bytes": len(file_content),
                     "file": file_base64
                 }
-                response2 = requests.post(
+                response2 = self.session.post(
                     url2,
-                    auth=self.auth,
                     headers=self.headers,
                     json=data2
                 )
                 if response2.status_code == 201:
-                    result2 = response2.json()
+                    result2 = json_loads(response2.content)
                     attachment_id2 = result2['result']['sys_id']
-                    print(f"[Fallback] Uploaded attachment: {file_name} (ID: {attachment_id2})", flush=True)
+                    log.info(f"[Fallback] Uploaded attachment: {file_name} (ID: {attachment_id2})")
                     return attachment_id2
                 else:
-                    print(f"[Fallback] Error: HTTP {response2.status_code}", flush=True)
-                    print(f"[Fallback] Response: {response2.text}", flush=True)
-                    print("[Force-Upload] All known upload methods failed.", flush=True)
+                    log.error(f"[Fallback] Error: HTTP {response2.status_code}")
+                    log.error(f"[Fallback] Response: {response2.text}")
+                    log.error("[Force-Upload] All known upload methods failed.")
                     return None
         except Exception as e:
-            print(f"Exception uploading attachment: {e}", flush=True)
+            log.error(f"Exception uploading attachment: {e}")
             return None
 
-def main():
-    """Main function to upload PDFs to ServiceNow"""
-    print("\n===== ServiceNow PDF Document Uploader =====", flush=True)
-    print(f"Instance: {INSTANCE_URL}", flush=True)
-    print(f"Username: {USERNAME}", flush=True)
-    print(f"Policy Folder: {POLICY_FOLDER}", flush=True)
-    
-    # Find PDF files in the Policy folder
-    pdf_files = glob.glob(os.path.join(POLICY_FOLDER, "*.pdf"))
+def find_pdf_files(folder=POLICY_FOLDER):
+    """Yield the paths of PDF files in a folder as the directory is scanned"""
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith('.pdf'):
+                yield entry.path
+
+def batched(iterable, size):
+    """Yield lists of up to size items from an iterable, consuming it lazily"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def article_for_pdf(pdf_file):
+    """Build the knowledge article title and content for a PDF file"""
+    file_name = os.path.basename(pdf_file)
+    file_base_name = os.path.splitext(file_name)[0]
     
-    if not pdf_files:
-        print(f"\nNo PDF files found in folder: {POLICY_FOLDER}", flush=True)
-        return
+    # Create article title and content from file name
+    article_title = f"Policy Document: {file_base_name.replace('_', ' ')}"
+    article_content = f"""
+    <h2>Policy Document</h2>
+    <p>This is an automatically uploaded policy document.</p>
+    <p>File: {file_name}</p>
+    <p>Upload Date: {time.strftime('%Y-%m-%d %H:%M:%S')}</p>
+    <p>Please see the attached PDF for complete information.</p>
+    """
+    return article_title, article_content
+
+def process_pdf_batch(uploader, executor, pdf_files):
+    """Create, attach and publish knowledge articles for a batch of PDF files
     
-    print(f"\nFound {len(pdf_files)} PDF files to upload.\n", flush=True)
+    The articles are created and published with one Batch API call each, while the
+    attachments are uploaded concurrently on the executor in between.
+    """
+    for pdf_file in pdf_files:
+        log.info(f"\n--- Processing: {os.path.basename(pdf_file)} ---")
     
-    uploader = ServiceNowUploader()
+    # Step 1: Create knowledge articles
+    article_ids = uploader.create_knowledge_articles([article_for_pdf(pdf_file) for pdf_file in pdf_files])
     
-    # Process each PDF file
-    for pdf_file in pdf_files:
+    # Step 2: Upload PDFs as attachments
+    def upload(pdf_file, article_id):
         file_name = os.path.basename(pdf_file)
-        file_base_name = os.path.splitext(file_name)[0]
-        
-        # Create article title and content from file name
-        article_title = f"Policy Document: {file_base_name.replace('_', ' ')}"
-        article_content = f"""
-        <h2>Policy Document</h2>
-        <p>This is an automatically uploaded policy document.</p>
-        <p>File: {file_name}</p>
-        <p>Upload Date: {time.strftime('%Y-%m-%d %H:%M:%S')}</p>
-        <p>Please see the attached PDF for complete information.</p>
-        """
-        
-        print(f"\n--- Processing: {file_name} ---", flush=True)
-        
-        # Step 1: Create knowledge article
-        article_id = uploader.create_knowledge_article(article_title, article_content)
         if not article_id:
-            print(f"Failed to create article for {file_name}, skipping...", flush=True)
-            continue
+            log.error(f"Failed to create article for {file_name}, skipping...")
+            return False
         
-        # Step 2: Upload PDF as attachment
         attachment_id = uploader.upload_attachment("kb_knowledge", article_id, pdf_file)
         if not attachment_id:
-            print(f"Failed to upload attachment for {file_name}", flush=True)
-            continue
-        
-        # Step 3: Publish the article
-        success = uploader.publish_article(article_id)
+            log.error(f"Failed to upload attachment for {file_name}")
+            return False
+        return True
+    
+    uploaded = list(executor.map(upload, pdf_files, article_ids))
+    
+    # Step 3: Publish the articles that have their attachment
+    to_publish = [article_id for article_id, ok in zip(article_ids, uploaded) if ok]
+    for article_id, success in zip(to_publish, uploader.publish_articles(to_publish)):
         if success:
             article_url = f"{INSTANCE_URL}/kb_view.do?sysparm_article={article_id}"
-            print(f"Successfully published article with attachment", flush=True)
-            print(f"Article URL: {article_url}", flush=True)
+            log.info(f"Successfully published article with attachment")
+            log.info(f"Article URL: {article_url}")
+
+def main():
+    """Main function to upload PDFs to ServiceNow"""
+    log.info("\n===== ServiceNow PDF Document Uploader =====")
+    log.info(f"Instance: {INSTANCE_URL}")
+    log.info(f"Username: {USERNAME}")
+    log.info(f"Policy Folder: {POLICY_FOLDER}")
+    
+    if not os.path.isdir(POLICY_FOLDER):
+        log.error(f"\nPolicy folder not found: {POLICY_FOLDER}")
+        return
+    
+    uploader = ServiceNowUploader()
+    
+    # Process the PDF files in batches as they are discovered
+    processed = 0
+    with ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS) as executor:
+        for pdf_batch in batched(find_pdf_files(), BATCH_SIZE):
+            process_pdf_batch(uploader, executor, pdf_batch)
+            processed += len(pdf_batch)
+    
+    if not processed:
+        log.info(f"\nNo PDF files found in folder: {POLICY_FOLDER}")
+        return
     
-    print("\n===== Upload Process Complete =====", flush=True)
-    print("Check your ServiceNow instance for the uploaded documents", flush=True)
+    log.info(f"\nProcessed {processed} PDF files.")
+    log.info("\n===== Upload Process Complete =====")
+    log.info("Check your ServiceNow instance for the uploaded documents")
 
 if __name__ == "__main__":
     main()